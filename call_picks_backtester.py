@@ -0,0 +1,339 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+import os
+import re
+import io
+import logging
+import subprocess
+from datetime import datetime
+from pandas.tseries.offsets import BDay
+
+# Set up logging
+log_level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+collector_file = "top_100_stock_and_options_data.csv"
+
+# Optional directory of saved collector outputs (e.g. top_100_..._2025-01-17.csv).
+# When unset, snapshots are read from the git history of the collector CSV.
+snapshot_dir = os.environ.get('SNAPSHOT_DIR')
+price_cache_dir = os.environ.get('PRICE_CACHE_DIR', os.path.join(script_dir, 'cache', 'prices'))
+offline = os.environ.get('BACKTEST_OFFLINE', '0') == '1'
+cache_ranges_file = '_ranges.csv'
+
+expiration_bins = [-np.inf, 30, 90, 180, 365, np.inf]
+expiration_labels = ['<=30d', '31-90d', '91-180d', '181-365d', '>365d']
+breakeven_bins = [-np.inf, 0, 0.05, 0.10, 0.20, np.inf]
+breakeven_labels = ['<=0%', '0-5%', '5-10%', '10-20%', '>20%']
+
+def load_git_snapshots(file_name=collector_file):
+    """Read every committed version of the collector CSV, dated by its commit time."""
+    try:
+        log = subprocess.run(
+            ['git', 'log', '--format=%H %cI', '--', file_name],
+            cwd=script_dir, capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.error(f"Error reading git history for {file_name}: {e}")
+        return []
+
+    snapshots = []
+    for line in log.splitlines():
+        sha, committed_at = line.split(' ', 1)
+        try:
+            content = subprocess.run(
+                ['git', 'show', f'{sha}:{file_name}'],
+                cwd=script_dir, capture_output=True, text=True, check=True
+            ).stdout
+            df = pd.read_csv(io.StringIO(content))
+        except Exception as e:
+            logger.warning(f"Skipping snapshot {sha[:8]}: {e}")
+            continue
+        # Collector output has no run date, so the commit date stands in for it
+        df['Snapshot Date'] = pd.Timestamp(committed_at).tz_convert(None).normalize()
+        snapshots.append(df)
+
+    logger.info(f"Loaded {len(snapshots)} snapshots from git history")
+    return snapshots
+
+def load_dir_snapshots(directory):
+    """Read collector CSVs from a directory, dated by a YYYY-MM-DD in the name or the file mtime."""
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.csv'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            df = pd.read_csv(path)
+        except Exception as e:
+            logger.warning(f"Skipping snapshot {name}: {e}")
+            continue
+        match = re.search(r'\d{4}-\d{2}-\d{2}', name)
+        if match:
+            df['Snapshot Date'] = pd.Timestamp(match.group(0))
+        else:
+            df['Snapshot Date'] = pd.Timestamp(os.path.getmtime(path), unit='s').normalize()
+        snapshots.append(df)
+
+    logger.info(f"Loaded {len(snapshots)} snapshots from {directory}")
+    return snapshots
+
+def extract_picks(snapshots):
+    """Keep the attractive contracts, each counted once from the first snapshot that flagged it."""
+    if not snapshots:
+        return pd.DataFrame()
+
+    df = pd.concat(snapshots, ignore_index=True)
+    attractive = df['Attractiveness'].astype(str).str.strip().str.lower() == 'true'
+    picks = df.loc[attractive, ['Ticker', 'Stock Price', 'Call Contract Price', 'Strike Price',
+                                'Expiration Date', 'Breakeven increase', 'Snapshot Date']].copy()
+
+    picks['Expiration Date'] = pd.to_datetime(picks['Expiration Date'], errors='coerce')
+    for column in ['Stock Price', 'Call Contract Price', 'Strike Price', 'Breakeven increase']:
+        picks[column] = pd.to_numeric(picks[column], errors='coerce')
+    picks = picks.dropna()
+    picks = picks[(picks['Call Contract Price'] > 0) & (picks['Stock Price'] > 0)]
+
+    picks = picks.sort_values('Snapshot Date')
+    picks = picks.drop_duplicates(subset=['Ticker', 'Strike Price', 'Expiration Date'], keep='first')
+    return picks.reset_index(drop=True)
+
+def download_history(tickers, start, end):
+    """Download daily High/Close and split ratios for tickers over [start, end) in one call.
+
+    yfinance returns prices adjusted for every split up to today, so 'Stock Splits' is kept
+    to rescale picks quoted before a split and to spot caches on an older basis.
+    """
+    try:
+        data = yf.download(tickers, start=start, end=end, group_by='ticker', auto_adjust=False,
+                           actions=True, progress=False)
+    except Exception as e:
+        logger.error(f"Error downloading price history: {e}")
+        return {}
+
+    histories = {}
+    for ticker in tickers:
+        try:
+            history = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+            history = history.reindex(columns=['High', 'Close', 'Stock Splits']).dropna(subset=['High', 'Close'])
+        except KeyError:
+            continue
+        history['Stock Splits'] = history['Stock Splits'].fillna(0)
+        history.index.name = 'Date'
+        histories[ticker] = history
+    return histories
+
+def load_cached_ranges():
+    """Return {ticker: (start, end)} of the ranges already requested into the price cache."""
+    path = os.path.join(price_cache_dir, cache_ranges_file)
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, parse_dates=['Start', 'End'])
+    return {row.Ticker: (row.Start, row.End) for row in df.itertuples()}
+
+def save_cached_ranges(cached_ranges):
+    rows = [{'Ticker': t, 'Start': s.strftime('%Y-%m-%d'), 'End': e.strftime('%Y-%m-%d')}
+            for t, (s, e) in sorted(cached_ranges.items())]
+    pd.DataFrame(rows, columns=['Ticker', 'Start', 'End']).to_csv(
+        os.path.join(price_cache_dir, cache_ranges_file), index=False)
+
+def load_price_history(tickers, start):
+    """Return {ticker: DataFrame[High, Close, Stock Splits]} from the local cache, downloading only what it lacks.
+
+    The cache records the [start, end) range requested for each ticker rather than relying on
+    the first and last rows, so weekends, holidays and late listings are not fetched again.
+    Tickers missing the same range are fetched together. A split inside a newly downloaded
+    range means the cached rows are on an older basis, so that ticker is downloaded afresh.
+    """
+    os.makedirs(price_cache_dir, exist_ok=True)
+    start = BDay().rollforward(pd.Timestamp(start))
+    # yfinance treats end as exclusive, so today's partial session is never cached
+    today = pd.Timestamp(datetime.now().date())
+
+    cached_ranges = load_cached_ranges()
+    prices = {}
+    ranges = {}
+    for ticker in tickers:
+        path = os.path.join(price_cache_dir, f"{ticker}.csv")
+        if os.path.exists(path):
+            prices[ticker] = pd.read_csv(path, index_col='Date', parse_dates=True).sort_index()
+        if ticker in prices and ticker in cached_ranges:
+            cached_start, cached_end = cached_ranges[ticker]
+            if start < cached_start:
+                ranges.setdefault((start, cached_start), []).append(ticker)
+            if cached_end < today:
+                ranges.setdefault((cached_end, today), []).append(ticker)
+        else:
+            ranges.setdefault((start, today), []).append(ticker)
+
+    if ranges and offline:
+        stale = sorted({t for batch in ranges.values() for t in batch})
+        logger.warning(f"Offline mode: cached prices incomplete for {len(stale)} tickers: {', '.join(stale)}")
+        return prices
+
+    def fetch(range_start, range_end, batch):
+        logger.info(f"Downloading daily price history for {len(batch)} tickers "
+                    f"from {range_start:%Y-%m-%d} to {range_end:%Y-%m-%d}...")
+        return download_history(batch, range_start.strftime('%Y-%m-%d'), range_end.strftime('%Y-%m-%d'))
+
+    def store(ticker, history, range_start, range_end):
+        history.to_csv(os.path.join(price_cache_dir, f"{ticker}.csv"))
+        prices[ticker] = history
+        cached_ranges[ticker] = (range_start, range_end)
+
+    rebased = []
+    for (range_start, range_end), batch in ranges.items():
+        histories = fetch(range_start, range_end, batch)
+        for ticker in batch:
+            if ticker not in histories:
+                continue
+            history = histories[ticker]
+            # Caches written before ranges were recorded are replaced, not extended
+            if ticker in cached_ranges:
+                cached_start, cached_end = cached_ranges[ticker]
+                if range_start >= cached_end and (history['Stock Splits'] > 0).any():
+                    rebased.append(ticker)
+                    continue
+                history = pd.concat([prices[ticker], history])
+                history = history[~history.index.duplicated(keep='last')].sort_index()
+                range_start, range_end = min(range_start, cached_start), max(range_end, cached_end)
+            store(ticker, history, range_start, range_end)
+
+    if rebased:
+        logger.info(f"Split since last run for {', '.join(rebased)}; replacing cached prices")
+        histories = fetch(start, today, rebased)
+        for ticker in rebased:
+            if ticker in histories:
+                store(ticker, histories[ticker], start, today)
+            else:
+                prices.pop(ticker, None)
+                cached_ranges.pop(ticker, None)
+
+    save_cached_ranges(cached_ranges)
+    for ticker in tickers:
+        if ticker not in prices:
+            logger.warning(f"No price history available for {ticker}")
+    return prices
+
+def evaluate_picks(picks, prices):
+    """Compute payoff at expiry, max favourable excursion and hit flags for all settled picks at once."""
+    picks = picks[picks['Ticker'].isin(prices.keys())].reset_index(drop=True)
+    if picks.empty:
+        return picks
+
+    # Dates x tickers panels so every pick can be indexed in one shot
+    tickers = sorted(picks['Ticker'].unique())
+    close = pd.concat({t: prices[t]['Close'] for t in tickers}, axis=1).sort_index()
+    high = pd.concat({t: prices[t]['High'] for t in tickers}, axis=1).sort_index()
+    splits = pd.concat({t: prices[t].get('Stock Splits', pd.Series(0.0, index=prices[t].index))
+                        for t in tickers}, axis=1).sort_index()
+    dates = close.index.values
+    # Fill holes inside each ticker's history only, never past its own last cached session
+    close_values = close.ffill().where(close.bfill().notna()).to_numpy(dtype=float)
+    high_values = high.to_numpy(dtype=float)
+    has_close = close.notna().to_numpy()
+    last_idx = len(dates) - 1 - np.argmax(has_close[::-1], axis=0)
+    # split_after[i] is the product of every split ratio on or after session i (1 past the end)
+    ratios = splits.fillna(0).to_numpy(dtype=float)
+    ratios = np.where(ratios > 0, ratios, 1.0)
+    split_after = np.vstack([np.cumprod(ratios[::-1], axis=0)[::-1], np.ones((1, len(tickers)))])
+
+    ticker_idx = np.searchsorted(tickers, picks['Ticker'].to_numpy())
+    entry_idx = np.searchsorted(dates, picks['Snapshot Date'].to_numpy(dtype='datetime64[ns]'), side='left')
+    # Last trading session on or before the expiration date
+    expiry_idx = np.searchsorted(dates, picks['Expiration Date'].to_numpy(dtype='datetime64[ns]'), side='right') - 1
+
+    settled = (picks['Expiration Date'].to_numpy(dtype='datetime64[ns]') <= dates[last_idx[ticker_idx]]) & (expiry_idx >= entry_idx)
+    picks = picks[settled].reset_index(drop=True)
+    ticker_idx, entry_idx, expiry_idx = ticker_idx[settled], entry_idx[settled], expiry_idx[settled]
+    if picks.empty:
+        return picks
+
+    # Prices are adjusted for every later split, so the contract is put on the same basis:
+    # strike, spot and premium shrink by the splits that happened after the snapshot
+    after_snapshot = np.searchsorted(dates, picks['Snapshot Date'].to_numpy(dtype='datetime64[ns]'), side='right')
+    split_factor = split_after[after_snapshot, ticker_idx]
+
+    settle_price = close_values[expiry_idx, ticker_idx]
+
+    # (dates x picks) mask of each pick's holding period, excluding sessions with no High
+    day = np.arange(len(dates))[:, None]
+    pick_high = high_values[:, ticker_idx]
+    window = (day >= entry_idx) & (day <= expiry_idx) & ~np.isnan(pick_high)
+    max_high = np.max(pick_high, axis=0, initial=-np.inf, where=window)
+
+    complete = window.any(axis=0) & ~np.isnan(settle_price)
+    if not complete.all():
+        logger.warning(f"Dropping {(~complete).sum()} picks with no price data inside their holding period")
+        picks = picks[complete].reset_index(drop=True)
+        settle_price, max_high, split_factor = settle_price[complete], max_high[complete], split_factor[complete]
+        if picks.empty:
+            return picks
+
+    spot = picks['Stock Price'].to_numpy() / split_factor
+    strike = picks['Strike Price'].to_numpy() / split_factor
+    premium = picks['Call Contract Price'].to_numpy() / split_factor
+    payoff = np.maximum(settle_price - strike, 0) - premium
+
+    picks['Days to Expiry'] = (picks['Expiration Date'] - picks['Snapshot Date']).dt.days
+    picks['Split Factor'] = split_factor
+    picks['Settle Price'] = settle_price
+    # Payoff is per share on the split-adjusted basis; Return is unaffected by splits
+    picks['Payoff'] = payoff
+    picks['Return'] = payoff / premium
+    picks['Max Favourable Excursion'] = max_high / spot - 1
+    picks['Hit'] = payoff > 0
+    picks['Breakeven Touched'] = picks['Max Favourable Excursion'].to_numpy() >= picks['Breakeven increase'].to_numpy()
+    return picks
+
+def summarize(results):
+    """Aggregate backtest results by expiration bucket and breakeven band."""
+    results = results.assign(
+        **{
+            'Expiration Bucket': pd.cut(results['Days to Expiry'], expiration_bins, labels=expiration_labels),
+            'Breakeven Band': pd.cut(results['Breakeven increase'], breakeven_bins, labels=breakeven_labels),
+        }
+    )
+    summary = results.groupby(['Expiration Bucket', 'Breakeven Band'], observed=True).agg(
+        Picks=('Ticker', 'size'),
+        **{
+            'Hit Rate': ('Hit', 'mean'),
+            'Breakeven Touch Rate': ('Breakeven Touched', 'mean'),
+            'Mean Return': ('Return', 'mean'),
+            'Median Return': ('Return', 'median'),
+            'Mean MFE': ('Max Favourable Excursion', 'mean'),
+        }
+    )
+    return summary.reset_index()
+
+def main():
+    logger.info("Starting attractiveness backtest...")
+
+    snapshots = load_dir_snapshots(snapshot_dir) if snapshot_dir else load_git_snapshots()
+    picks = extract_picks(snapshots)
+    if picks.empty:
+        logger.error("No attractive picks found in collector history")
+        return
+
+    start = picks['Snapshot Date'].min().strftime('%Y-%m-%d')
+    prices = load_price_history(sorted(picks['Ticker'].unique()), start)
+
+    results = evaluate_picks(picks, prices)
+    if results.empty:
+        logger.error("No picks have reached expiration with price data available")
+        return
+
+    summary = summarize(results)
+    logger.info(f"Evaluated {len(results)} settled picks, overall hit rate {results['Hit'].mean():.1%}")
+
+    results.to_csv(os.path.join(script_dir, "call_picks_backtest_detail.csv"), index=False)
+    file_path = os.path.join(script_dir, "call_picks_backtest_summary.csv")
+    summary.to_csv(file_path, index=False)
+
+    logger.info(f"File saved to: {file_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import pandas as pd
+import numpy as np
+import os
+import logging
+import time
+import tracemalloc
+
+from stock_option_data_collector import fetch_batch_data, top_100_tickers
+from option_strategy_search import search_expiration, max_strikes
+
+logger = logging.getLogger(__name__)
+
+# BENCHMARK_OFFLINE=1 skips Yahoo Finance and times synthetic chains only
+offline = os.environ.get('BENCHMARK_OFFLINE', '0') == '1'
+widest_count = int(os.environ.get('BENCHMARK_WIDEST', '5'))
+synthetic_widths = [100, 250, 500, 1000, 2000]
+repeats = 5
+
+def synthetic_chain(stock_price, n_strikes, seed=0):
+    """Calls and puts with n_strikes strikes, roughly priced, with noisy quotes to exercise pruning."""
+    rng = np.random.default_rng(seed)
+    strikes = np.round(np.linspace(stock_price * 0.2, stock_price * 3, n_strikes), 2)
+    time_value = stock_price * 0.1 * np.exp(-((strikes - stock_price) / stock_price) ** 2)
+    call_mid = np.maximum(stock_price - strikes, 0) + time_value
+    put_mid = np.maximum(strikes - stock_price, 0) + time_value
+
+    def chain(mid):
+        mid = mid * rng.uniform(0.95, 1.05, n_strikes)
+        spread = np.maximum(mid * 0.02, 0.01)
+        return pd.DataFrame({'strike': strikes, 'lastPrice': mid, 'bid': mid - spread, 'ask': mid + spread})
+
+    return chain(call_mid), chain(put_mid)
+
+def widest_watchlist_chains(count):
+    """Download the `count` widest chains in the watchlist, taking each ticker's widest expiration."""
+    yf_data = fetch_batch_data(top_100_tickers)
+    if yf_data is None:
+        return []
+
+    chains = []
+    for ticker in top_100_tickers:
+        try:
+            stock = yf_data.tickers[ticker]
+            widest = None
+            for expiration_date in stock.options:
+                option_chain = stock.option_chain(expiration_date)
+                width = len(option_chain.calls) + len(option_chain.puts)
+                if widest is None or width > widest[0]:
+                    widest = (width, expiration_date, option_chain)
+                time.sleep(0.5)
+            if widest is None:
+                continue
+            _, expiration_date, option_chain = widest
+            stock_price = stock.history(period='5d')['Close'].iloc[-1]
+            chains.append((ticker, expiration_date, stock_price, option_chain.calls, option_chain.puts))
+        except Exception as e:
+            logger.error(f"Error fetching chains for {ticker}: {e}")
+
+    chains.sort(key=lambda c: len(c[3]) + len(c[4]), reverse=True)
+    return chains[:count]
+
+def time_search(ticker, expiration_date, stock_price, calls, puts, strike_limit=None):
+    """Average runtime over `repeats` runs, then peak memory from one separate traced run."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        search_expiration(ticker, expiration_date, stock_price, calls, puts, strike_limit=strike_limit)
+    elapsed = (time.perf_counter() - start) / repeats
+
+    # tracemalloc slows allocation down, so it is kept out of the timed runs
+    tracemalloc.start()
+    search_expiration(ticker, expiration_date, stock_price, calls, puts, strike_limit=strike_limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'Ticker': ticker,
+        'Expiration Date': expiration_date,
+        'Call Strikes': len(calls),
+        'Put Strikes': len(puts),
+        'Strike Cap': max_strikes if strike_limit is None else strike_limit,
+        'Seconds': elapsed,
+        'Peak MB': peak / 1_000_000,
+    }
+
+def time_capped_and_uncapped(ticker, expiration_date, stock_price, calls, puts):
+    """Time a chain with the configured STRATEGY_MAX_STRIKES cap and with no cap at all."""
+    return [
+        time_search(ticker, expiration_date, stock_price, calls, puts),
+        time_search(ticker, expiration_date, stock_price, calls, puts, strike_limit=np.inf),
+    ]
+
+def main():
+    results = []
+
+    for n_strikes in synthetic_widths:
+        calls, puts = synthetic_chain(100.0, n_strikes, seed=n_strikes)
+        results.extend(time_capped_and_uncapped('SYNTHETIC', f'{n_strikes} strikes', 100.0, calls, puts))
+
+    if not offline:
+        for chain in widest_watchlist_chains(widest_count):
+            results.extend(time_capped_and_uncapped(*chain))
+
+    df = pd.DataFrame(results)
+    logger.info(f"Strategy search benchmark ({repeats} runs each):\n{df.to_string(index=False)}")
+
+if __name__ == "__main__":
+    main()
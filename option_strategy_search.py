@@ -0,0 +1,290 @@
+import pandas as pd
+import numpy as np
+import os
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pandas.tseries.offsets import BDay
+
+from stock_option_data_collector import fetch_batch_data, top_100_tickers
+
+# Set up logging
+log_level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Candidates kept per ticker for each strategy; reward/risk is not comparable across
+# strategies (spreads score far above covered calls), so each gets its own top K
+top_k = int(os.environ.get('STRATEGY_TOP_K', '5'))
+# Smallest net debit a spread may have; sub-tick debits are quote noise, not trades
+min_debit = float(os.environ.get('STRATEGY_MIN_DEBIT', '0.05'))
+# Strikes kept per leg after pruning, nearest to the stock price first; bounds each
+# broadcast grid to max_strikes x max_strikes whatever the size of the chain
+max_strikes = int(os.environ.get('STRATEGY_MAX_STRIKES', '200'))
+max_expirations = os.environ.get('STRATEGY_MAX_EXPIRATIONS')
+# Largest stock move a candidate may need to reach its max gain. Reward/risk alone always
+# favours the furthest out-of-the-money strikes, so candidates are limited to this move
+# first. Bullish strategies use the collector's own test instead when the data exists:
+# the move must stay below both the 52-week-high and the 1y-target upside.
+max_move = float(os.environ.get('STRATEGY_MAX_MOVE', '0.2'))
+
+result_columns = ['Ticker', 'Strategy', 'Expiration Date', 'Stock Price', 'Long Strike', 'Short Strike',
+                  'Net Debit', 'Max Gain', 'Max Loss', 'Breakeven', 'Breakeven increase', 'Reward/Risk',
+                  'Priced On']
+
+def leg_prices(chain):
+    """Return (strikes, buy prices, sell prices, stale), paying the ask and receiving the bid.
+
+    Buys fall back to the last trade when there is no ask. A strike with no bid has no
+    buyer, so its sell price is NaN and it is never used as a short leg. When no strike
+    in the chain has a bid (Yahoo reports zero bids outside market hours) both sides are
+    priced on last trades instead and stale is True.
+    """
+    chain = chain.sort_values('strike')
+    strikes = chain['strike'].to_numpy(dtype=float)
+    last = chain['lastPrice'].to_numpy(dtype=float)
+    bid = chain['bid'].to_numpy(dtype=float) if 'bid' in chain else np.full_like(last, np.nan)
+    ask = chain['ask'].to_numpy(dtype=float) if 'ask' in chain else np.full_like(last, np.nan)
+
+    if not (bid > 0).any():
+        return strikes, last, last, True
+    return strikes, np.where(ask > 0, ask, last), np.where(bid > 0, bid, np.nan), False
+
+def undominated(prices, buy, low_strike_better):
+    """Mask of strikes not dominated by a better-placed strike at an equal or better price.
+
+    A bought call (or sold put) is dominated by any lower strike that costs no more (or pays
+    no less); bought puts and sold calls are the mirror image. Dropping these legs removes
+    every dominated spread before any pairs are built.
+    """
+    invalid = ~(prices > 0)
+    p = np.where(invalid, np.inf if buy else -np.inf, prices)
+    if not low_strike_better:
+        p = p[::-1]
+
+    if buy:
+        best_so_far = np.concatenate([[np.inf], np.minimum.accumulate(p)[:-1]])
+        keep = p < best_so_far
+    else:
+        best_so_far = np.concatenate([[-np.inf], np.maximum.accumulate(p)[:-1]])
+        keep = p > best_so_far
+
+    if not low_strike_better:
+        keep = keep[::-1]
+    return keep & ~invalid
+
+def nearest_strikes(strikes, stock_price, limit=None):
+    """Indices of at most `limit` strikes closest to the stock price, in strike order."""
+    limit = max_strikes if limit is None else limit
+    if len(strikes) <= limit:
+        return np.arange(len(strikes))
+    return np.sort(np.argpartition(np.abs(strikes - stock_price), limit)[:limit])
+
+def leg(strikes, prices, stock_price, buy, low_strike_better, strike_limit=None, low=-np.inf, high=np.inf):
+    # Out-of-range strikes are removed before pruning so they cannot dominate the ones kept
+    in_range = (strikes >= low) & (strikes <= high)
+    keep = np.flatnonzero(undominated(np.where(in_range, prices, np.nan), buy, low_strike_better))
+    keep = keep[nearest_strikes(strikes[keep], stock_price, strike_limit)]
+    return strikes[keep], prices[keep]
+
+def top_indices(scores, valid, k):
+    """Flat indices of the k best valid scores, best first."""
+    candidates = np.flatnonzero(valid)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores.ravel()[candidates], k)[:k]]
+    return candidates[np.argsort(-scores.ravel()[candidates])]
+
+def search_vertical_spreads(long_strikes, long_prices, short_strikes, short_prices, direction, k):
+    """Score every long/short strike pair by broadcasting and return the k best.
+
+    direction is +1 for a bull call spread (short strike above the long one) and -1 for a
+    bear put spread (short strike below).
+    """
+    width = direction * (short_strikes[None, :] - long_strikes[:, None])
+    debit = long_prices[:, None] - short_prices[None, :]
+    max_gain = width - debit
+    valid = (width > 0) & (debit >= min_debit) & (max_gain > 0)
+    reward_risk = np.divide(max_gain, debit, out=np.zeros_like(max_gain), where=valid)
+
+    best = top_indices(reward_risk, valid, k)
+    i, j = np.unravel_index(best, reward_risk.shape)
+    return pd.DataFrame({
+        'Long Strike': long_strikes[i],
+        'Short Strike': short_strikes[j],
+        'Net Debit': debit[i, j],
+        'Max Gain': max_gain[i, j],
+        'Max Loss': debit[i, j],
+        'Breakeven': long_strikes[i] + direction * debit[i, j],
+        'Reward/Risk': reward_risk[i, j],
+    })
+
+def search_covered_calls(stock_price, call_strikes, call_bids, k):
+    """Score buying the stock and selling each call strike, returning the k best.
+
+    Only strikes at or above the stock price are used; deep in-the-money calls turn the
+    trade into a loan against the shares rather than a bet on the upside.
+    """
+    debit = stock_price - call_bids
+    max_gain = call_strikes - debit
+    valid = (call_strikes >= stock_price) & (call_bids > 0) & (debit > 0) & (max_gain > 0)
+    reward_risk = np.divide(max_gain, debit, out=np.zeros_like(max_gain), where=valid)
+
+    best = top_indices(reward_risk, valid, k)
+    return pd.DataFrame({
+        'Long Strike': np.nan,
+        'Short Strike': call_strikes[best],
+        'Net Debit': debit[best],
+        'Max Gain': max_gain[best],
+        'Max Loss': debit[best],
+        'Breakeven': debit[best],
+        'Reward/Risk': reward_risk[best],
+    })
+
+def search_expiration(ticker, expiration_date, stock_price, calls, puts, k=None, strike_limit=None,
+                      max_upside=None, max_downside=None):
+    """Best k candidates of each strategy for a single option chain.
+
+    Every strategy here reaches its max gain at the short strike, so short legs are limited
+    to strikes within max_upside (calls) or max_downside (puts) of the stock price. The
+    breakeven lies between the two strikes and stays inside the same range.
+    """
+    k = top_k if k is None else k
+    max_upside = max_move if max_upside is None else max_upside
+    max_downside = max_move if max_downside is None else max_downside
+    candidates = []
+
+    if not calls.empty:
+        strikes, ask, bid, stale = leg_prices(calls)
+        priced_on = 'Last Trade' if stale else 'Bid/Ask'
+        long_calls = leg(strikes, ask, stock_price, buy=True, low_strike_better=True, strike_limit=strike_limit)
+        short_calls = leg(strikes, bid, stock_price, buy=False, low_strike_better=False, strike_limit=strike_limit,
+                          high=stock_price * (1 + max_upside))
+        spreads = search_vertical_spreads(*long_calls, *short_calls, direction=1, k=k)
+        candidates.append(spreads.assign(Strategy='Bull Call Spread', **{'Priced On': priced_on}))
+        covered_calls = search_covered_calls(stock_price, *short_calls, k=k)
+        candidates.append(covered_calls.assign(Strategy='Covered Call', **{'Priced On': priced_on}))
+
+    if not puts.empty:
+        strikes, ask, bid, stale = leg_prices(puts)
+        priced_on = 'Last Trade' if stale else 'Bid/Ask'
+        long_puts = leg(strikes, ask, stock_price, buy=True, low_strike_better=False, strike_limit=strike_limit)
+        short_puts = leg(strikes, bid, stock_price, buy=False, low_strike_better=True, strike_limit=strike_limit,
+                         low=stock_price * (1 - max_downside))
+        spreads = search_vertical_spreads(*long_puts, *short_puts, direction=-1, k=k)
+        candidates.append(spreads.assign(Strategy='Bear Put Spread', **{'Priced On': priced_on}))
+
+    candidates = [c for c in candidates if not c.empty]
+    if not candidates:
+        return pd.DataFrame(columns=result_columns)
+
+    df = pd.concat(candidates, ignore_index=True)
+    df['Ticker'] = ticker
+    df['Expiration Date'] = expiration_date
+    df['Stock Price'] = stock_price
+    df['Breakeven increase'] = df['Breakeven'] / stock_price - 1
+    return df[result_columns]
+
+def search_ticker(ticker, yf_data, k=None):
+    k = top_k if k is None else k
+    try:
+        stock = yf_data.tickers[ticker]
+
+        last_business_day = (datetime.now() - BDay(1)).strftime('%Y-%m-%d')
+        history = stock.history(start=last_business_day)
+        if history.empty:
+            logger.warning(f"No historical data available for {ticker}")
+            return None
+        stock_price = history['Close'].iloc[-1]
+
+        # Same upside test as the collector's Attractiveness flag
+        max_upside = None
+        try:
+            company_info = stock.info
+            fifty_two_week_high = company_info.get('fiftyTwoWeekHigh')
+            one_year_target = company_info.get('targetMeanPrice')
+            if fifty_two_week_high and one_year_target:
+                max_upside = min(fifty_two_week_high, one_year_target) / stock_price - 1
+        except Exception as e:
+            logger.warning(f"Error fetching company info for {ticker}, using STRATEGY_MAX_MOVE: {e}")
+
+        expiration_dates = stock.options
+        if not expiration_dates:
+            logger.warning(f"No options available for {ticker}")
+            return None
+        if max_expirations:
+            expiration_dates = expiration_dates[:int(max_expirations)]
+
+        results = []
+        for expiration_date in expiration_dates:
+            try:
+                option_chain = stock.option_chain(expiration_date)
+            except Exception as e:
+                logger.error(f"Error fetching {expiration_date} chain for {ticker}: {e}")
+                continue
+            results.append(search_expiration(ticker, expiration_date, stock_price,
+                                             option_chain.calls, option_chain.puts, k, max_upside=max_upside))
+            time.sleep(0.5)
+
+        results = [r for r in results if not r.empty]
+        if not results:
+            return None
+        df = pd.concat(results, ignore_index=True)
+        stale = df.loc[df['Priced On'] == 'Last Trade', 'Expiration Date'].nunique()
+        if stale:
+            logger.warning(f"No bids quoted for {ticker} on {stale} of {df['Expiration Date'].nunique()} "
+                           f"expirations; those candidates are priced on last trades")
+        return df.sort_values('Reward/Risk', ascending=False).groupby('Strategy').head(k)
+
+    except Exception as e:
+        logger.error(f"Error searching strategies for {ticker}: {e}")
+        return None
+
+def search_in_batches(tickers, batch_size=50, k=None):
+    all_data = []
+
+    for i in range(0, len(tickers), batch_size):
+        batch = tickers[i:i + batch_size]
+        logger.info(f"Processing batch {i//batch_size + 1} of {len(tickers)//batch_size + 1}")
+
+        yf_data = fetch_batch_data(batch)
+        if yf_data is None:
+            continue
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            future_to_ticker = {
+                executor.submit(search_ticker, ticker, yf_data, k): ticker
+                for ticker in batch
+            }
+
+            for future in as_completed(future_to_ticker):
+                result = future.result()
+                if result is not None:
+                    all_data.append(result)
+
+        time.sleep(1)  # Delay between batches
+
+    return all_data
+
+def main():
+    logger.info("Starting option strategy search...")
+
+    data = search_in_batches(top_100_tickers, batch_size=50)
+
+    if not data:
+        logger.error("No strategies were found")
+        return
+
+    df = pd.concat(data, ignore_index=True)
+    df = df.sort_values(by=['Ticker', 'Strategy', 'Reward/Risk'], ascending=[True, True, False])
+
+    file_name = "option_strategies_top.csv"
+    file_path = os.path.join(script_dir, file_name)
+    df.to_csv(file_path, index=False)
+
+    logger.info(f"File saved to: {file_path}")
+
+if __name__ == "__main__":
+    main()